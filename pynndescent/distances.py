@@ -66,6 +66,66 @@ def squared_euclidean(x, y):
     return result
 
 
+# Dimensions for which ``fixed_dim_squared_euclidean`` will generate a specialised
+# kernel; these cover common embedding and benchmark dataset dimensions.
+FIXED_DIM_SQUARED_EUCLIDEAN_DIMS = frozenset(
+    (25, 32, 50, 64, 96, 100, 128, 200, 256, 300, 384, 512, 768, 784, 960, 1024)
+)
+_fixed_dim_squared_euclidean_cache = {}
+
+
+def fixed_dim_squared_euclidean(dim):
+    r"""Generate a squared euclidean distance specialised to vectors of a fixed
+    dimension. With the dimension a compile time constant the loop has a known
+    trip count, so LLVM can fully vectorise and unroll it with no remainder
+    handling (for ``dim=128`` this is a handful of packed FMA instructions).
+    Specialised kernels are cached, so each dimension is compiled only once.
+
+    .. math::
+        D(x, y) = \sum_i (x_i - y_i)^2
+
+    Parameters
+    ----------
+    dim: int
+        The dimension of the vectors the distance will be applied to. The
+        returned function must only be used on vectors of this dimension.
+
+    Returns
+    -------
+    dist: numba compiled function
+        The specialised squared euclidean distance.
+    """
+    dim = int(dim)
+    if dim in _fixed_dim_squared_euclidean_cache:
+        return _fixed_dim_squared_euclidean_cache[dim]
+
+    @numba.njit(
+        [
+            "f4(f4[::1],f4[::1])",
+            numba.types.float32(
+                numba.types.Array(numba.types.float32, 1, "C", readonly=True),
+                numba.types.Array(numba.types.float32, 1, "C", readonly=True),
+            ),
+        ],
+        fastmath=True,
+        boundscheck=False,
+        locals={
+            "result": numba.types.float32,
+            "diff": numba.types.float32,
+        },
+    )
+    def fixed_dim_sq_euclidean(x, y):
+        result = 0.0
+        for i in range(dim):
+            diff = x[i] - y[i]
+            result += diff * diff
+
+        return result
+
+    _fixed_dim_squared_euclidean_cache[dim] = fixed_dim_sq_euclidean
+    return fixed_dim_sq_euclidean
+
+
 @numba.njit(fastmath=True, cache=True)
 def standardised_euclidean(x, y, sigma=_mock_ones):
     r"""Euclidean distance standardised against a vector of standard
@@ -12,7 +12,7 @@ import joblib
 from pynndescent.utils import (
     rejection_sample,
     make_heap,
-    deheap_sort,
+    deheap_sort_np,
     simple_heap_push,
     has_been_visited,
     mark_visited,
@@ -154,7 +154,7 @@ def find_component_connection_edge(
         result = search_closure(
             query_points, candidate_indices, search_size, epsilon, visited
         )
-        inds, dists = deheap_sort(result)
+        inds, dists = deheap_sort_np(result)
         for i in range(dists.shape[0]):
             for j in range(dists.shape[1]):
                 if dists[i, j] < best_dist:
@@ -27,6 +27,7 @@ from pynndescent.utils import (
     tau_rand,
     make_heap,
     deheap_sort,
+    deheap_sort_np,
     new_build_candidates,
     ts,
     simple_heap_push,
@@ -165,7 +166,7 @@ def init_from_neighbor_graph(heap, indices, distances):
             q = indices[p, k]
             d = distances[p, k]
             # unchecked_heap_push(heap, p, d, q, 0)
-            flagged_heap_push(heap[0][p], heap[1][p], heap[2][p], q, d, 0)
+            flagged_heap_push(heap[1][p], heap[0][p], heap[2][p], d, q, 0)
 
     return
 
@@ -748,6 +749,12 @@ class NNDescent(object):
                 return _distance_func(x, y, *dist_args)
 
             self._distance_func = _partial_dist_func
+        elif (
+            _distance_func is pynnd_dist.squared_euclidean
+            and not isspmatrix_csr(data)
+            and data.shape[1] in pynnd_dist.FIXED_DIM_SQUARED_EUCLIDEAN_DIMS
+        ):
+            self._distance_func = pynnd_dist.fixed_dim_squared_euclidean(data.shape[1])
         else:
             self._distance_func = _distance_func
 
@@ -1649,7 +1656,7 @@ class NNDescent(object):
                 self.search_rng_state,
             )
 
-        indices, dists = deheap_sort(result)
+        indices, dists = deheap_sort_np(result)
         # Sort to input graph_data order
         indices = self._vertex_order[indices]
 
@@ -56,6 +56,14 @@ def sparse_nn_data():
     return sparse.random(1000, 50, density=0.5, format="csr")
 
 
+@pytest.fixture
+def fixed_dim_nn_data(seed):
+    # 32 is one of the dimensions with a specialised squared euclidean kernel;
+    # embed low dimensional data so that the neighbors are well defined
+    rng = np.random.RandomState(seed)
+    return rng.uniform(0, 1, size=(1200, 5)) @ rng.normal(size=(5, 32))
+
+
 @pytest.fixture
 def cosine_hang_data():
     this_dir = os.path.dirname(os.path.abspath(__file__))
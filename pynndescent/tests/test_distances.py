@@ -220,6 +220,26 @@ def test_sparse_binary_check(sparse_binary_data, metric):
     )
 
 
+def test_fixed_dim_squared_euclidean(spatial_data):
+    dist_matrix = pairwise_distances(spatial_data, metric="sqeuclidean")
+    fixed_dim_dist = dist.fixed_dim_squared_euclidean(spatial_data.shape[1])
+    test_matrix = np.array(
+        [
+            [
+                fixed_dim_dist(spatial_data[i], spatial_data[j])
+                for j in range(spatial_data.shape[0])
+            ]
+            for i in range(spatial_data.shape[0])
+        ]
+    )
+    assert_array_almost_equal(
+        test_matrix,
+        dist_matrix,
+        decimal=4,
+        err_msg="Distances don't match " "for fixed dimension squared euclidean",
+    )
+
+
 def test_seuclidean(spatial_data):
     v = np.abs(np.random.randn(spatial_data.shape[1]))
     dist_matrix = pairwise_distances(spatial_data, metric="seuclidean", V=v)
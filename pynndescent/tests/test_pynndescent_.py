@@ -13,6 +13,7 @@ import joblib
 import scipy
 
 from pynndescent import NNDescent, PyNNDescentTransformer
+import pynndescent.distances as pynnd_dist
 
 
 def test_nn_descent_neighbor_accuracy(nn_data, seed):
@@ -33,6 +34,45 @@ def test_nn_descent_neighbor_accuracy(nn_data, seed):
     )
 
 
+def test_nn_descent_high_memory_neighbor_accuracy(nn_data, seed):
+    knn_indices, _ = NNDescent(
+        nn_data,
+        "euclidean",
+        {},
+        10,
+        low_memory=False,
+        random_state=np.random.RandomState(seed),
+    )._neighbor_graph
+
+    tree = KDTree(nn_data)
+    true_indices = tree.query(nn_data, 10, return_distance=False)
+
+    num_correct = 0.0
+    for i in range(nn_data.shape[0]):
+        num_correct += np.sum(np.in1d(true_indices[i], knn_indices[i]))
+
+    percent_correct = num_correct / (nn_data.shape[0] * 10)
+    assert percent_correct >= 0.98, (
+        "NN-descent did not get 99% " "accuracy on nearest neighbors"
+    )
+
+
+def test_nn_descent_block_multiple_of_vertices(seed):
+    # The last candidate block is empty when the number of vertices is an
+    # exact multiple of the block size
+    data = np.random.RandomState(seed).rand(16384, 8).astype(np.float32)
+    for random_state in (1, 2, 3):
+        knn_indices, _ = NNDescent(
+            data, n_neighbors=10, random_state=random_state
+        )._neighbor_graph
+        assert knn_indices.min() >= 0
+
+    knn_indices, _ = NNDescent(
+        scipy.sparse.csr_matrix(data), n_neighbors=10, random_state=2
+    )._neighbor_graph
+    assert knn_indices.min() >= 0
+
+
 def test_angular_nn_descent_neighbor_accuracy(nn_data, seed):
     knn_indices, _ = NNDescent(
         nn_data, "cosine", {}, 10, random_state=np.random.RandomState(seed)
@@ -71,6 +111,30 @@ def test_sparse_nn_descent_neighbor_accuracy(sparse_nn_data, seed):
     )
 
 
+def test_sparse_init_graph(sparse_nn_data, seed):
+    tree = KDTree(sparse_nn_data.toarray())
+    true_indices = tree.query(sparse_nn_data.toarray(), 10, return_distance=False)
+
+    knn_indices, _ = NNDescent(
+        sparse_nn_data,
+        "euclidean",
+        n_neighbors=10,
+        init_graph=true_indices,
+        n_iters=1,
+        random_state=np.random.RandomState(seed),
+    )._neighbor_graph
+
+    num_correct = 0.0
+    for i in range(sparse_nn_data.shape[0]):
+        num_correct += np.sum(np.in1d(true_indices[i], knn_indices[i]))
+
+    percent_correct = num_correct / (sparse_nn_data.shape[0] * 10)
+    assert percent_correct >= 0.99, (
+        "Sparse NN-descent from the true graph did not get 99% "
+        "accuracy on nearest neighbors"
+    )
+
+
 @pytest.mark.skipif(list(map(int, scipy.version.version.split('.'))) < [1,3,0], reason="requires scipy >= 1.3.0")
 def test_sparse_angular_nn_descent_neighbor_accuracy(sparse_nn_data):
     knn_indices, _ = NNDescent(
@@ -108,6 +172,46 @@ def test_nn_descent_query_accuracy(nn_data):
     )
 
 
+def test_nn_descent_fixed_dim_euclidean_accuracy(fixed_dim_nn_data):
+    data = fixed_dim_nn_data
+    nnd = NNDescent(data, "euclidean", n_neighbors=10, random_state=None)
+    assert nnd._distance_func is pynnd_dist.fixed_dim_squared_euclidean(32)
+    knn_indices, _ = nnd._neighbor_graph
+
+    tree = KDTree(data)
+    true_indices = tree.query(data, 10, return_distance=False)
+
+    num_correct = 0.0
+    for i in range(true_indices.shape[0]):
+        num_correct += np.sum(np.in1d(true_indices[i], knn_indices[i]))
+
+    percent_correct = num_correct / (true_indices.shape[0] * 10)
+    assert percent_correct >= 0.98, (
+        "NN-descent did not get 98% " "accuracy on nearest neighbors"
+    )
+
+
+def test_nn_descent_fixed_dim_euclidean_query_accuracy(fixed_dim_nn_data):
+    data = fixed_dim_nn_data
+    nnd = NNDescent(
+        data[200:], "euclidean", n_neighbors=10, random_state=None, tree_init=False
+    )
+    assert nnd._distance_func is pynnd_dist.fixed_dim_squared_euclidean(32)
+    knn_indices, _ = nnd.query(data[:200], k=10, epsilon=0.2)
+
+    tree = KDTree(data[200:])
+    true_indices = tree.query(data[:200], 10, return_distance=False)
+
+    num_correct = 0.0
+    for i in range(true_indices.shape[0]):
+        num_correct += np.sum(np.in1d(true_indices[i], knn_indices[i]))
+
+    percent_correct = num_correct / (true_indices.shape[0] * 10)
+    assert percent_correct >= 0.95, (
+        "NN-descent query did not get 95% " "accuracy on nearest neighbors"
+    )
+
+
 def test_nn_descent_query_accuracy_angular(nn_data):
     nnd = NNDescent(nn_data[200:], "cosine", n_neighbors=30, random_state=None)
     knn_indices, _ = nnd.query(nn_data[:200], k=10, epsilon=0.32)
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+
+from pynndescent import utils
+
+
+def check_heap_property(priorities):
+    for i in range(priorities.shape[0]):
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < priorities.shape[0]:
+                assert priorities[i] >= priorities[child]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 30])
+def test_heap_push_variants(size):
+    rng = np.random.RandomState(42)
+    values = rng.rand(200).astype(np.float32)
+    elements = rng.randint(0, 50, 200).astype(np.int32)
+
+    simple_priorities = np.full(size, np.inf, dtype=np.float32)
+    simple_indices = np.full(size, -1, dtype=np.int32)
+    checked_priorities = np.full(size, np.inf, dtype=np.float32)
+    checked_indices = np.full(size, -1, dtype=np.int32)
+    checked_flags = np.zeros(size, dtype=np.uint8)
+    u2_priorities = np.full(size, 0xFFFF, dtype=np.uint16)
+    u2_indices = np.full(size, -1, dtype=np.int32)
+    py_priorities = np.full(size, np.inf, dtype=np.float32)
+    py_indices = np.full(size, -1, dtype=np.int32)
+    py_flags = np.zeros(size, dtype=np.uint8)
+
+    for value, element in zip(values, elements):
+        utils.simple_heap_push(simple_priorities, simple_indices, value, element)
+        utils.checked_flagged_heap_push(
+            checked_priorities, checked_indices, checked_flags, value, element, 1
+        )
+        utils.checked_u2_heap_push(
+            u2_priorities, u2_indices, np.uint16(value * 0xFFFF), element
+        )
+        utils._heap_push_kernel(
+            py_priorities, py_indices, py_flags, value, element, 1, True
+        )
+
+    check_heap_property(simple_priorities)
+    check_heap_property(checked_priorities)
+    check_heap_property(u2_priorities)
+    assert_array_almost_equal(np.sort(simple_priorities), np.sort(values)[:size])
+
+    assert np.unique(checked_indices).shape[0] == size
+    assert np.unique(u2_indices).shape[0] == size
+    assert_array_equal(py_priorities, checked_priorities)
+    assert_array_equal(py_indices, checked_indices)
+    assert_array_equal(py_flags, checked_flags)
+    assert_array_equal(checked_flags, np.ones(size, dtype=np.uint8))
+
+
+@pytest.mark.parametrize("dim", [0, 1, 5, 8, 16, 19, 37])
+def test_norm(dim):
+    vec = np.random.RandomState(dim).normal(size=dim).astype(np.float32)
+    assert_array_almost_equal(utils.norm(vec), np.linalg.norm(vec), decimal=5)
+
+
+@pytest.mark.parametrize(
+    "n_samples,pool_size", [(5, 1000), (250, 1000), (50, 60), (10, 10), (10, 3)]
+)
+def test_rejection_sample(n_samples, pool_size, seed):
+    rng_state = (
+        np.random.RandomState(seed).randint(-(2**31), 2**31 - 1, 3).astype(np.int64)
+    )
+    sample = utils.rejection_sample(np.int64(n_samples), pool_size, rng_state)
+
+    assert sample.shape[0] == min(n_samples, pool_size)
+    assert np.unique(sample).shape[0] == sample.shape[0]
+    assert sample.min() >= 0
+    assert sample.max() < pool_size
+
+
+def test_deheap_sort():
+    rng = np.random.RandomState(42)
+    heap = utils.make_heap(10, 7)
+    for i in range(10):
+        for value, element in zip(rng.rand(20), rng.randint(0, 100, 20)):
+            utils.checked_flagged_heap_push(
+                heap[1][i], heap[0][i], heap[2][i], value, element, 1
+            )
+
+    np_indices, np_distances = utils.deheap_sort_np(heap)
+    indices, distances = utils.deheap_sort(heap)
+
+    assert_array_equal(np.sort(distances, axis=1), distances)
+    assert_array_equal(np_indices, indices)
+    assert_array_equal(np_distances, distances)
@@ -6,7 +6,7 @@ import time
 
 import numba
 from numba.core import types
-import numba.experimental.structref as structref
+from numba.extending import overload
 import numpy as np
 
 
@@ -16,7 +16,7 @@ def seed(rng_state, seed):
     rng_state.fill(seed + 0xFFFF)
 
 
-@numba.njit("i4(i8[:])")
+@numba.njit("i4(i8[:])", cache=True)
 def tau_rand_int(state):
     """A fast (pseudo)-random number generator.
 
@@ -42,7 +42,7 @@ def tau_rand_int(state):
     return state[0] ^ state[1] ^ state[2]
 
 
-@numba.njit("f4(i8[:])")
+@numba.njit("f4(i8[:])", cache=True)
 def tau_rand(state):
     """A fast (pseudo)-random number generator for floats in the range [0,1]
 
@@ -59,6 +59,63 @@ def tau_rand(state):
     return abs(float(integer) / 0x7FFFFFFF)
 
 
+@numba.njit("i8(i4, i8)", cache=True)
+def fast_range(x, n):
+    """Map a (pseudo)-random int32 value onto the range [0, n) using a
+    multiply and shift (Lemire's method) rather than an integer modulo, which
+    is far slower.
+
+    Parameters
+    ----------
+    x: int32
+        A (pseudo)-random value, as from ``tau_rand_int``
+
+    n: int
+        The size of the range to map onto; must be less than 2**32
+
+    Returns
+    -------
+    An int64 value in the interval [0, n)
+    """
+    return np.int64((np.uint64(np.uint32(x)) * np.uint64(n)) >> np.uint64(32))
+
+
+@numba.njit("u2(i8[:])", cache=True)
+def tau_rand_u2(state):
+    """A fast (pseudo)-random 16 bit priority in the range [0, 65535). This is
+    sufficient for heaps that only use priorities to order their elements at
+    random, and leaves 65535 free as an "empty" sentinel.
+
+    Parameters
+    ----------
+    state: array of int64, shape (3,)
+        The internal state of the rng
+
+    Returns
+    -------
+    A (pseudo)-random uint16 in the interval [0, 65535)
+    """
+    return np.uint16(fast_range(tau_rand_int(state), 0xFFFF))
+
+
+@numba.njit("void(u2[::1], i8[:])", cache=True)
+def tau_rand_fill_u2(out, state):
+    """Fill an array with (pseudo)-random 16 bit priorities; see
+    ``tau_rand_u2``. Drawing a batch up front keeps the dependent chain of rng
+    state updates out of the caller's inner loop.
+
+    Parameters
+    ----------
+    out: array of uint16, shape (n,)
+        The array to fill
+
+    state: array of int64, shape (3,)
+        The internal state of the rng
+    """
+    for k in range(out.shape[0]):
+        out[k] = tau_rand_u2(state)
+
+
 @numba.njit(
     [
         "f4(f4[::1])",
@@ -68,14 +125,29 @@ def tau_rand(state):
     ],
     locals={
         "dim": numba.types.intp,
-        "i": numba.types.uint32,
-        "result": numba.types.float32,
+        "tail": numba.types.intp,
+        "i": numba.types.intp,
+        "acc0": numba.types.float32,
+        "acc1": numba.types.float32,
+        "acc2": numba.types.float32,
+        "acc3": numba.types.float32,
+        "acc4": numba.types.float32,
+        "acc5": numba.types.float32,
+        "acc6": numba.types.float32,
+        "acc7": numba.types.float32,
     },
     fastmath=True,
+    boundscheck=False,
+    error_model="numpy",
+    cache=True,
 )
 def norm(vec):
     """Compute the (standard l2) norm of a vector.
 
+    The sum of squares is accumulated in eight independent partial sums so
+    that the loop is not serialised on a single dependent accumulator; this
+    lets LLVM emit packed (FMA) SIMD instructions for long vectors.
+
     Parameters
     ----------
     vec: array of shape (dim,)
@@ -84,18 +156,44 @@ def norm(vec):
     -------
     The l2 norm of vec.
     """
-    result = 0.0
+    acc0 = 0.0
+    acc1 = 0.0
+    acc2 = 0.0
+    acc3 = 0.0
+    acc4 = 0.0
+    acc5 = 0.0
+    acc6 = 0.0
+    acc7 = 0.0
     dim = vec.shape[0]
-    for i in range(dim):
-        result += vec[i] * vec[i]
-    return np.sqrt(result)
+    tail = dim - (dim % 8)
+
+    for i in range(0, tail, 8):
+        acc0 += vec[i] * vec[i]
+        acc1 += vec[i + 1] * vec[i + 1]
+        acc2 += vec[i + 2] * vec[i + 2]
+        acc3 += vec[i + 3] * vec[i + 3]
+        acc4 += vec[i + 4] * vec[i + 4]
+        acc5 += vec[i + 5] * vec[i + 5]
+        acc6 += vec[i + 6] * vec[i + 6]
+        acc7 += vec[i + 7] * vec[i + 7]
+
+    for i in range(tail, dim):
+        acc0 += vec[i] * vec[i]
+
+    return np.sqrt(((acc0 + acc1) + (acc2 + acc3)) + ((acc4 + acc5) + (acc6 + acc7)))
 
 
 @numba.njit()
 def rejection_sample(n_samples, pool_size, rng_state):
     """Generate n_samples many integers from 0 to pool_size such that no
-    integer is selected twice. The duplication constraint is achieved via
-    rejection sampling.
+    integer is selected twice. When the sample is small relative to the pool
+    the duplication constraint is achieved via rejection sampling, with
+    previously selected integers tracked in a bitset so that each check is a
+    single lookup. For dense samples (at least a quarter of the pool), where
+    rejections become frequent, Floyd's algorithm is used instead, which needs
+    exactly one random draw per sample. The order of the sample is not
+    uniformly random in that case. If ``n_samples`` is at least ``pool_size``
+    the whole pool is returned in a random order.
 
     Parameters
     ----------
@@ -110,77 +208,50 @@ def rejection_sample(n_samples, pool_size, rng_state):
 
     Returns
     -------
-    sample: array of shape(n_samples,)
+    sample: array of shape(min(n_samples, pool_size),)
         The ``n_samples`` randomly selected elements from the pool.
     """
+    if n_samples >= pool_size:
+        result = np.arange(pool_size, dtype=np.int64)
+        for i in range(pool_size - 1, 0, -1):
+            j = fast_range(tau_rand_int(rng_state), i + 1)
+            result[i], result[j] = result[j], result[i]
+        return result
+
     result = np.empty(n_samples, dtype=np.int64)
-    for i in range(n_samples):
-        reject_sample = True
-        j = 0
-        while reject_sample:
-            j = tau_rand_int(rng_state) % pool_size
-            for k in range(i):
-                if j == result[k]:
-                    break
-            else:
-                reject_sample = False
-        result[i] = j
+    selected = np.zeros((pool_size + 7) >> 3, dtype=np.uint8)
+    if n_samples * 4 >= pool_size:
+        for i in range(n_samples):
+            k = pool_size - n_samples + i
+            j = np.int32(fast_range(tau_rand_int(rng_state), k + 1))
+            if has_been_visited(selected, j):
+                j = np.int32(k)
+            mark_visited(selected, j)
+            result[i] = j
+    else:
+        for i in range(n_samples):
+            j = np.int32(fast_range(tau_rand_int(rng_state), pool_size))
+            while has_been_visited(selected, j):
+                j = np.int32(fast_range(tau_rand_int(rng_state), pool_size))
+            mark_visited(selected, j)
+            result[i] = j
     return result
 
 
-@structref.register
-class HeapType(types.StructRef):
-    pass
-
-
-class Heap(structref.StructRefProxy):
-    @property
-    def indices(self):
-        return Heap_get_indices(self)
-
-    @property
-    def distances(self):
-        return Heap_get_distances(self)
-
-    @property
-    def flags(self):
-        return Heap_get_flags(self)
-
-
-@numba.njit
-def Heap_get_flags(self):
-    return self.flags
-
-
-@numba.njit
-def Heap_get_distances(self):
-    return self.distances
-
-
-@numba.njit
-def Heap_get_indices(self):
-    return self.indices
-
-
-structref.define_proxy(
-    Heap,
-    HeapType,
-    ["indices", "distances", "flags"],
-)
-
-# Heap = namedtuple("Heap", ("indices", "distances", "flags"))
-
-
 @numba.njit()
 def make_heap(n_points, size):
     """Constructor for the numba enabled heap objects. The heaps are used
     for approximate nearest neighbor search, maintaining a list of potential
     neighbors sorted by their distance. We also flag if potential neighbors
     are newly added to the list or not. Internally this is stored as
-    a single ndarray; the first axis determines whether we are looking at the
-    array of candidate graph_indices, the array of distances, or the flag array for
-    whether elements are new or not. Each of these arrays are of shape
-    (``n_points``, ``size``)
+    a tuple of three ndarrays: the array of candidate graph_indices, the array
+    of distances, and the flag array for whether elements are new or not. Each
+    of these arrays are C-contiguous of shape (``n_points``, ``size``).
+
+    The three arrays are deliberately kept separate (rather than as a single
+    record array of (distance, index, flag) entries) since the heap push
+    kernels are compiled for C-contiguous rows of each array, and a row of a
+    record array field is a strided view that numba cannot type as such.
 
     Parameters
     ----------
@@ -192,7 +263,8 @@ def make_heap(n_points, size):
 
     Returns
     -------
-    heap: An ndarray suitable for passing to other numba enabled heap functions.
+    heap: A tuple of ndarrays suitable for passing to other numba enabled heap
+    functions.
     """
     indices = np.full((int(n_points), int(size)), -1, dtype=np.int32)
     distances = np.full((int(n_points), int(size)), np.infty, dtype=np.float32)
@@ -202,118 +274,146 @@ def make_heap(n_points, size):
     return result
 
 
-@numba.jit(
-    locals={
-        "indices": numba.types.int32[::1],
-        "weights": numba.types.float32[::1],
-        "is_new": numba.types.uint8[::1],
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-        "heap_size": numba.types.uint16,
-    }
-)
-def heap_push(heap, row, weight, index, flag):
-    """Push a new element onto the heap. The heap stores potential neighbors
-    for each graph_data point. The ``row`` parameter determines which graph_data point we
-    are addressing, the ``weight`` determines the distance (for heap sorting),
-    the ``index`` is the element to add, and the flag determines whether this
-    is to be considered a new addition.
+def _heap_push_kernel(priorities, indices, flags, p, n, f, check_duplicates):
+    """Push a new element onto a single row heap, optionally carrying a flag
+    array alongside and optionally rejecting elements already present. From
+    numba compiled code a specialised kernel is generated for each combination
+    of ``flags`` being ``None`` or an array, and ``check_duplicates`` being
+    (literally) ``True`` or ``False``, with the unused branches eliminated at
+    compile time; this pure python version checks both at run time.
 
     Parameters
     ----------
-    heap: ndarray generated by ``make_heap``
-        The heap object to push into
+    priorities: array of shape (size,)
+        The priorities (distances) of the heap, a max heap on priority
 
-    row: int
-        Which actual heap within the heap object to push to
+    indices: array of shape (size,)
+        The elements of the heap
 
-    weight: float
+    flags: array of shape (size,) or None
+        The flags of the heap elements, if the heap carries flags
+
+    p: float
         The priority value of the element to push onto the heap
 
-    index: int
+    n: int
         The actual value to be pushed
 
-    flag: int
-        Whether to flag the newly added element or not.
+    f: int
+        The flag of the pushed element; ignored if ``flags`` is None
+
+    check_duplicates: bool (literal)
+        Whether to reject ``n`` if it is already in the heap
 
     Returns
     -------
     success: The number of new elements successfully pushed into the heap.
     """
-    row = np.int32(row)
-    weight = np.float32(weight)
-    index = np.int32(index)
-    flag = np.uint8(flag)
-
-    indices = heap[0][row]
-    weights = heap[1][row]
-    is_new = heap[2][row]
-
-    if weight >= weights[0]:
+    if p >= priorities[0]:
         return 0
 
+    size = priorities.shape[0]
+
     # break if we already have this element.
-    for i in range(indices.shape[0]):
-        if index == indices[i]:
-            return 0
+    if check_duplicates:
+        for i in range(size):
+            if n == indices[i]:
+                return 0
 
     # insert val at position zero
-    weights[0] = weight
-    indices[0] = index
-    is_new[0] = flag
+    priorities[0] = p
+    indices[0] = n
+    if flags is not None:
+        flags[0] = f
 
     # descend the heap, swapping values until the max heap criterion is met
     i = 0
     while True:
         ic1 = 2 * i + 1
+        if ic1 >= size:
+            break
+
         ic2 = ic1 + 1
+        i_swap = ic1 if (ic2 >= size or priorities[ic1] >= priorities[ic2]) else ic2
 
-        if ic1 >= indices.shape[0]:
+        if p >= priorities[i_swap]:
             break
-        elif ic2 >= indices.shape[0]:
-            if weights[ic1] > weight:
-                i_swap = ic1
-            else:
-                break
-        elif weights[ic1] >= weights[ic2]:
-            if weight < weights[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if weight < weights[ic2]:
-                i_swap = ic2
-            else:
-                break
 
-        weights[i] = weights[i_swap]
+        priorities[i] = priorities[i_swap]
         indices[i] = indices[i_swap]
-        is_new[i] = is_new[i_swap]
+        if flags is not None:
+            flags[i] = flags[i_swap]
 
         i = i_swap
 
-    weights[i] = weight
-    indices[i] = index
-    is_new[i] = flag
+    priorities[i] = p
+    indices[i] = n
+    if flags is not None:
+        flags[i] = f
 
     return 1
 
 
-@numba.jit(
-    locals={
-        "indices": numba.types.int32[::1],
-        "weights": numba.types.float32[::1],
-        "is_new": numba.types.uint8[::1],
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-        "heap_size": numba.types.uint16,
-    }
-)
-def unchecked_heap_push(heap, row, weight, index, flag):
+@overload(_heap_push_kernel, jit_options={"fastmath": True}, inline="always")
+def _heap_push_kernel_impl(priorities, indices, flags, p, n, f, check_duplicates):
+    if not isinstance(check_duplicates, types.BooleanLiteral):
+        return None
+
+    has_flags = not isinstance(flags, (types.NoneType, types.Omitted))
+    check = check_duplicates.literal_value
+
+    def impl(priorities, indices, flags, p, n, f, check_duplicates):
+        if p >= priorities[0]:
+            return 0
+
+        size = priorities.shape[0]
+
+        # break if we already have this element.
+        if check:
+            for i in range(size):
+                if n == indices[i]:
+                    return 0
+
+        # insert val at position zero
+        priorities[0] = p
+        indices[0] = n
+        if has_flags:
+            flags[0] = f
+
+        # descend the heap, swapping values until the max heap criterion is met;
+        # the larger child is chosen with a select rather than a branch since
+        # the comparison is unpredictable on random data.
+        i = 0
+        while True:
+            ic1 = 2 * i + 1
+            if ic1 >= size:
+                break
+
+            ic2 = ic1 + 1
+            i_swap = ic1 if (ic2 >= size or priorities[ic1] >= priorities[ic2]) else ic2
+
+            if p >= priorities[i_swap]:
+                break
+
+            priorities[i] = priorities[i_swap]
+            indices[i] = indices[i_swap]
+            if has_flags:
+                flags[i] = flags[i_swap]
+
+            i = i_swap
+
+        priorities[i] = p
+        indices[i] = n
+        if has_flags:
+            flags[i] = f
+
+        return 1
+
+    return impl
+
+
+@numba.njit()
+def heap_push(heap, row, weight, index, flag):
     """Push a new element onto the heap. The heap stores potential neighbors
     for each graph_data point. The ``row`` parameter determines which graph_data point we
     are addressing, the ``weight`` determines the distance (for heap sorting),
@@ -341,55 +441,48 @@ def unchecked_heap_push(heap, row, weight, index, flag):
     -------
     success: The number of new elements successfully pushed into the heap.
     """
-    if weight >= heap[1][row, 0]:
-        return 0
+    row = np.int32(row)
+    weight = np.float32(weight)
+    index = np.int32(index)
+    flag = np.uint8(flag)
 
-    indices = heap[0][row]
-    weights = heap[1][row]
-    is_new = heap[2][row]
+    return _heap_push_kernel(
+        heap[1][row], heap[0][row], heap[2][row], weight, index, flag, True
+    )
 
-    # insert val at position zero
-    weights[0] = weight
-    indices[0] = index
-    is_new[0] = flag
 
-    heap_size = indices.shape[0]
+@numba.njit()
+def unchecked_heap_push(heap, row, weight, index, flag):
+    """Push a new element onto the heap. The heap stores potential neighbors
+    for each graph_data point. The ``row`` parameter determines which graph_data point we
+    are addressing, the ``weight`` determines the distance (for heap sorting),
+    the ``index`` is the element to add, and the flag determines whether this
+    is to be considered a new addition.
 
-    # descend the heap, swapping values until the max heap criterion is met
-    i = 0
-    while True:
-        ic1 = 2 * i + 1
-        ic2 = ic1 + 1
+    Parameters
+    ----------
+    heap: ndarray generated by ``make_heap``
+        The heap object to push into
 
-        if ic1 >= heap_size:
-            break
-        elif ic2 >= heap_size:
-            if weights[ic1] > weight:
-                i_swap = ic1
-            else:
-                break
-        elif weights[ic1] >= weights[ic2]:
-            if weight < weights[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if weight < weights[ic2]:
-                i_swap = ic2
-            else:
-                break
+    row: int
+        Which actual heap within the heap object to push to
 
-        weights[i] = weights[i_swap]
-        indices[i] = indices[i_swap]
-        is_new[i] = is_new[i_swap]
+    weight: float
+        The priority value of the element to push onto the heap
 
-        i = i_swap
+    index: int
+        The actual value to be pushed
 
-    weights[i] = weight
-    indices[i] = index
-    is_new[i] = flag
+    flag: int
+        Whether to flag the newly added element or not.
 
-    return 1
+    Returns
+    -------
+    success: The number of new elements successfully pushed into the heap.
+    """
+    return _heap_push_kernel(
+        heap[1][row], heap[0][row], heap[2][row], weight, index, flag, False
+    )
 
 
 @numba.njit()
@@ -416,17 +509,17 @@ def siftdown(heap1, heap2, elt):
             elt = swap
 
 
-@numba.njit()
+@numba.njit(parallel=True)
 def deheap_sort(heap):
     """Given an array of heaps (of graph_indices and weights), unpack the heap
     out to give and array of sorted lists of graph_indices and weights by increasing
-    weight. This is effectively just the second half of heap sort (the first
-    half not being required since we already have the graph_data in a heap).
+    weight. Each row is sorted in place via an argsort of its weights, with
+    rows processed in parallel.
 
     Parameters
     ----------
-    heap : array of shape (3, n_samples, n_neighbors)
-        The heap to turn into sorted lists.
+    heap : tuple of three arrays of shape (n_samples, n_neighbors)
+        The heap, as generated by ``make_heap``, to turn into sorted lists.
 
     Returns
     -------
@@ -436,28 +529,35 @@ def deheap_sort(heap):
     indices = heap[0]
     weights = heap[1]
 
-    for i in range(indices.shape[0]):
+    for i in numba.prange(indices.shape[0]):
+        order = np.argsort(weights[i], kind="mergesort")
+        indices[i] = indices[i][order]
+        weights[i] = weights[i][order]
 
-        ind_heap = indices[i]
-        dist_heap = weights[i]
+    return indices.astype(np.int64), weights
 
-        for j in range(ind_heap.shape[0] - 1):
-            ind_heap[0], ind_heap[ind_heap.shape[0] - j - 1] = (
-                ind_heap[ind_heap.shape[0] - j - 1],
-                ind_heap[0],
-            )
-            dist_heap[0], dist_heap[dist_heap.shape[0] - j - 1] = (
-                dist_heap[dist_heap.shape[0] - j - 1],
-                dist_heap[0],
-            )
 
-            siftdown(
-                dist_heap[: dist_heap.shape[0] - j - 1],
-                ind_heap[: ind_heap.shape[0] - j - 1],
-                0,
-            )
+def deheap_sort_np(heap):
+    """Given an array of heaps (of graph_indices and weights), produce arrays of
+    sorted lists of graph_indices and weights by increasing weight. This is a
+    numpy based version of ``deheap_sort`` for use from (non-numba) python code;
+    unlike ``deheap_sort`` the heap itself is left unmodified.
 
-    return indices.astype(np.int64), weights
+    Parameters
+    ----------
+    heap : tuple of three arrays of shape (n_samples, n_neighbors)
+        The heap, as generated by ``make_heap``, to turn into sorted lists.
+
+    Returns
+    -------
+    graph_indices, weights: arrays of shape (n_samples, n_neighbors)
+        The graph_indices and weights sorted by increasing weight.
+    """
+    order = np.argsort(heap[1], axis=1, kind="stable")
+    return (
+        np.take_along_axis(heap[0].astype(np.int64), order, axis=1),
+        np.take_along_axis(heap[1], order, axis=1),
+    )
 
 
 @numba.njit()
@@ -499,6 +599,18 @@ def smallest_flagged(heap, row):
         return -1
 
 
+@numba.njit(inline="always")
+def thread_index(i, n_threads, thread_mask, threads_pow2):
+    """Determine which of ``n_threads`` threads owns row ``i``, using a bitmask
+    rather than an integer modulo when ``n_threads`` is a power of two; the
+    ``thread_mask`` (``n_threads - 1``) and ``threads_pow2`` flag should be
+    computed once by the caller."""
+    if threads_pow2:
+        return i & thread_mask
+    else:
+        return i % n_threads
+
+
 @numba.njit(parallel=True, locals={"idx": numba.types.int64})
 def new_build_candidates(
     current_graph,
@@ -532,83 +644,162 @@ def new_build_candidates(
     n_neighbors = current_indices.shape[1]
 
     new_candidate_indices = np.full((n_vertices, max_candidates), -1, dtype=np.int32)
+    # Candidate priorities are only random keys used to pick a random subset
+    # of candidates, so they are stored as uint16 (with 0xFFFF as the empty
+    # sentinel) to halve the memory traffic of the candidate heaps.
     new_candidate_priority = np.full(
-        (n_vertices, max_candidates), np.inf, dtype=np.float32
+        (n_vertices, max_candidates), 0xFFFF, dtype=np.uint16
     )
 
     old_candidate_indices = np.full((n_vertices, max_candidates), -1, dtype=np.int32)
     old_candidate_priority = np.full(
-        (n_vertices, max_candidates), np.inf, dtype=np.float32
+        (n_vertices, max_candidates), 0xFFFF, dtype=np.uint16
     )
 
+    # Transpose the graph into per-target lists of reverse edges (a CSR layout
+    # of source vertices and flags), so that candidates can be gathered target
+    # row by target row rather than scattering pushes into random heaps. Each
+    # thread owns a contiguous block of vertices. The edges are first counted
+    # and scattered by (source block, target block), so each thread only
+    # writes to its own slots, then each thread sorts the edges into its own
+    # block of targets into per-target lists.
     n_threads = numba.get_num_threads()
+    block_size = (n_vertices + n_threads - 1) // n_threads
 
+    block_counts = np.zeros((n_threads, n_threads), dtype=np.int64)
+    for n in numba.prange(n_threads):
+        for i in range(
+            min(n_vertices, n * block_size), min(n_vertices, (n + 1) * block_size)
+        ):
+            for j in range(n_neighbors):
+                idx = current_indices[i, j]
+                if idx >= 0:
+                    block_counts[n, idx // block_size] += 1
+
+    # Edges into a target block are laid out by source block, so the sources
+    # of each target stay in ascending order.
+    block_starts = np.zeros(n_threads + 1, dtype=np.int64)
+    block_cursors = np.empty((n_threads, n_threads), dtype=np.int64)
+    for t in range(n_threads):
+        k = block_starts[t]
+        for n in range(n_threads):
+            block_cursors[n, t] = k
+            k += block_counts[n, t]
+        block_starts[t + 1] = k
+
+    n_edges = block_starts[n_threads]
+    staged_targets = np.empty(n_edges, dtype=np.int32)
+    staged_sources = np.empty(n_edges, dtype=np.int32)
+    staged_flags = np.empty(n_edges, dtype=np.uint8)
+    for n in numba.prange(n_threads):
+        for i in range(
+            min(n_vertices, n * block_size), min(n_vertices, (n + 1) * block_size)
+        ):
+            for j in range(n_neighbors):
+                idx = current_indices[i, j]
+                if idx >= 0:
+                    t = idx // block_size
+                    k = block_cursors[n, t]
+                    staged_targets[k] = idx
+                    staged_sources[k] = i
+                    staged_flags[k] = current_flags[i, j]
+                    block_cursors[n, t] = k + 1
+
+    reverse_offsets = np.zeros(n_vertices + 1, dtype=np.int64)
+    reverse_sources = np.empty(n_edges, dtype=np.int32)
+    reverse_flags = np.empty(n_edges, dtype=np.uint8)
+    for n in numba.prange(n_threads):
+        block_start = min(n_vertices, n * block_size)
+        block_end = min(n_vertices, (n + 1) * block_size)
+        for k in range(block_starts[n], block_starts[n + 1]):
+            reverse_offsets[staged_targets[k] + 1] += 1
+
+        reverse_cursors = np.empty(block_end - block_start, dtype=np.int64)
+        k = block_starts[n]
+        for i in range(block_start, block_end):
+            reverse_cursors[i - block_start] = k
+            k += reverse_offsets[i + 1]
+            reverse_offsets[i + 1] = k
+
+        for k in range(block_starts[n], block_starts[n + 1]):
+            i = staged_targets[k] - block_start
+            reverse_sources[reverse_cursors[i]] = staged_sources[k]
+            reverse_flags[reverse_cursors[i]] = staged_flags[k]
+            reverse_cursors[i] += 1
+
+    # Each thread fills the candidate heaps of its block of vertices from the
+    # forward edges (the row itself) and the reverse edges (the row's bucket),
+    # so all pushes from a thread go to rows in order and no heap is touched
+    # by more than one thread.
     for n in numba.prange(n_threads):
         local_rng_state = rng_state + n
-        for i in range(n_vertices):
+        row_priorities = np.empty(n_neighbors, dtype=np.uint16)
+        block_end = min(n_vertices, (n + 1) * block_size)
+        for i in range(n * block_size, block_end):
+            tau_rand_fill_u2(row_priorities, local_rng_state)
             for j in range(n_neighbors):
                 idx = current_indices[i, j]
-                isn = current_flags[i, j]
 
                 if idx < 0:
                     continue
 
-                d = tau_rand(local_rng_state)
-
-                if isn:
-                    if i % n_threads == n:
-                        checked_heap_push(
-                            new_candidate_priority[i],
-                            new_candidate_indices[i],
-                            d,
-                            idx,
-                        )
-                    if idx % n_threads == n:
-                        checked_heap_push(
-                            new_candidate_priority[idx],
-                            new_candidate_indices[idx],
-                            d,
-                            i,
-                        )
+                if current_flags[i, j]:
+                    checked_u2_heap_push(
+                        new_candidate_priority[i],
+                        new_candidate_indices[i],
+                        row_priorities[j],
+                        idx,
+                    )
+                else:
+                    checked_u2_heap_push(
+                        old_candidate_priority[i],
+                        old_candidate_indices[i],
+                        row_priorities[j],
+                        idx,
+                    )
+
+            for k in range(reverse_offsets[i], reverse_offsets[i + 1]):
+                d = tau_rand_u2(local_rng_state)
+                if reverse_flags[k]:
+                    checked_u2_heap_push(
+                        new_candidate_priority[i],
+                        new_candidate_indices[i],
+                        d,
+                        reverse_sources[k],
+                    )
                 else:
-                    if i % n_threads == n:
-                        checked_heap_push(
-                            old_candidate_priority[i],
-                            old_candidate_indices[i],
-                            d,
-                            idx,
-                        )
-                    if idx % n_threads == n:
-                        checked_heap_push(
-                            old_candidate_priority[idx],
-                            old_candidate_indices[idx],
-                            d,
-                            i,
-                        )
+                    checked_u2_heap_push(
+                        old_candidate_priority[i],
+                        old_candidate_indices[i],
+                        d,
+                        reverse_sources[k],
+                    )
 
     indices = current_graph[0]
     flags = current_graph[2]
 
+    # Neighbors that were selected as new candidates are no longer new; sort
+    # each row of candidates once so membership is a binary search.
     for i in numba.prange(n_vertices):
+        sorted_candidates = np.sort(new_candidate_indices[i])
         for j in range(n_neighbors):
             idx = indices[i, j]
 
-            for k in range(max_candidates):
-                if new_candidate_indices[i, k] == idx:
-                    flags[i, j] = 0
-                    break
+            k = np.searchsorted(sorted_candidates, idx)
+            if k < max_candidates and sorted_candidates[k] == idx:
+                flags[i, j] = 0
 
     return new_candidate_indices, old_candidate_indices
 
 
-@numba.njit("b1(u1[::1],i4)")
+@numba.njit("b1(u1[::1],i4)", cache=True)
 def has_been_visited(table, candidate):
     loc = candidate >> 3
     mask = 1 << (candidate & 7)
     return table[loc] & mask
 
 
-@numba.njit("void(u1[::1],i4)")
+@numba.njit("void(u1[::1],i4)", cache=True)
 def mark_visited(table, candidate):
     loc = candidate >> 3
     mask = 1 << (candidate & 7)
@@ -616,244 +807,35 @@ def mark_visited(table, candidate):
     return
 
 
-@numba.njit(
-    "i4(f4[::1],i4[::1],f4,i4)",
-    fastmath=True,
-    locals={
-        "size": numba.types.intp,
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-    },
-)
-def simple_heap_push(priorities, indices, p, n):
-    if p >= priorities[0]:
-        return 0
+# Word-at-a-time versions of the visited table helpers. A visited table of
+# uint8 whose length is a multiple of 8 can be viewed as uint64 via
+# ``table.view(np.uint64)``; on little-endian platforms the bit for a given
+# candidate is the same in either view, so the two sets of helpers can be mixed.
 
-    size = priorities.shape[0]
 
-    # insert val at position zero
-    priorities[0] = p
-    indices[0] = n
-
-    # descend the heap, swapping values until the max heap criterion is met
-    i = 0
-    while True:
-        ic1 = 2 * i + 1
-        ic2 = ic1 + 1
-
-        if ic1 >= size:
-            break
-        elif ic2 >= size:
-            if priorities[ic1] > p:
-                i_swap = ic1
-            else:
-                break
-        elif priorities[ic1] >= priorities[ic2]:
-            if p < priorities[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if p < priorities[ic2]:
-                i_swap = ic2
-            else:
-                break
-
-        priorities[i] = priorities[i_swap]
-        indices[i] = indices[i_swap]
-
-        i = i_swap
-
-    priorities[i] = p
-    indices[i] = n
-
-    return 1
+@numba.njit("i4(f4[::1],i4[::1],f4,i4)", fastmath=True, cache=True)
+def simple_heap_push(priorities, indices, p, n):
+    return _heap_push_kernel(priorities, indices, None, p, n, 0, False)
 
 
-@numba.njit(
-    "i4(f4[::1],i4[::1],f4,i4)",
-    fastmath=True,
-    locals={
-        "size": numba.types.intp,
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-    },
-)
+@numba.njit("i4(f4[::1],i4[::1],f4,i4)", fastmath=True, cache=True)
 def checked_heap_push(priorities, indices, p, n):
-    if p >= priorities[0]:
-        return 0
+    return _heap_push_kernel(priorities, indices, None, p, n, 0, True)
 
-    size = priorities.shape[0]
-
-    # break if we already have this element.
-    for i in range(size):
-        if n == indices[i]:
-            return 0
 
-    # insert val at position zero
-    priorities[0] = p
-    indices[0] = n
-
-    # descend the heap, swapping values until the max heap criterion is met
-    i = 0
-    while True:
-        ic1 = 2 * i + 1
-        ic2 = ic1 + 1
+@numba.njit("i4(u2[::1],i4[::1],u2,i4)", fastmath=True, cache=True)
+def checked_u2_heap_push(priorities, indices, p, n):
+    return _heap_push_kernel(priorities, indices, None, p, n, 0, True)
 
-        if ic1 >= size:
-            break
-        elif ic2 >= size:
-            if priorities[ic1] > p:
-                i_swap = ic1
-            else:
-                break
-        elif priorities[ic1] >= priorities[ic2]:
-            if p < priorities[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if p < priorities[ic2]:
-                i_swap = ic2
-            else:
-                break
-
-        priorities[i] = priorities[i_swap]
-        indices[i] = indices[i_swap]
 
-        i = i_swap
-
-    priorities[i] = p
-    indices[i] = n
-
-    return 1
-
-
-@numba.njit(
-    "i4(f4[::1],i4[::1],u1[::1],f4,i4,u1)",
-    fastmath=True,
-    locals={
-        "size": numba.types.intp,
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-    },
-)
+@numba.njit("i4(f4[::1],i4[::1],u1[::1],f4,i4,u1)", fastmath=True, cache=True)
 def flagged_heap_push(priorities, indices, flags, p, n, f):
-    if p >= priorities[0]:
-        return 0
+    return _heap_push_kernel(priorities, indices, flags, p, n, f, False)
 
-    size = priorities.shape[0]
-
-    # insert val at position zero
-    priorities[0] = p
-    indices[0] = n
-    flags[0] = f
 
-    # descend the heap, swapping values until the max heap criterion is met
-    i = 0
-    while True:
-        ic1 = 2 * i + 1
-        ic2 = ic1 + 1
-
-        if ic1 >= size:
-            break
-        elif ic2 >= size:
-            if priorities[ic1] > p:
-                i_swap = ic1
-            else:
-                break
-        elif priorities[ic1] >= priorities[ic2]:
-            if p < priorities[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if p < priorities[ic2]:
-                i_swap = ic2
-            else:
-                break
-
-        priorities[i] = priorities[i_swap]
-        indices[i] = indices[i_swap]
-        flags[i] = flags[i_swap]
-
-        i = i_swap
-
-    priorities[i] = p
-    indices[i] = n
-    flags[i] = f
-
-    return 1
-
-
-@numba.njit(
-    "i4(f4[::1],i4[::1],u1[::1],f4,i4,u1)",
-    fastmath=True,
-    locals={
-        "size": numba.types.intp,
-        "i": numba.types.uint16,
-        "ic1": numba.types.uint16,
-        "ic2": numba.types.uint16,
-        "i_swap": numba.types.uint16,
-    },
-)
+@numba.njit("i4(f4[::1],i4[::1],u1[::1],f4,i4,u1)", fastmath=True, cache=True)
 def checked_flagged_heap_push(priorities, indices, flags, p, n, f):
-    if p >= priorities[0]:
-        return 0
-
-    size = priorities.shape[0]
-
-    # break if we already have this element.
-    for i in range(size):
-        if n == indices[i]:
-            return 0
-
-    # insert val at position zero
-    priorities[0] = p
-    indices[0] = n
-    flags[0] = f
-
-    # descend the heap, swapping values until the max heap criterion is met
-    i = 0
-    while True:
-        ic1 = 2 * i + 1
-        ic2 = ic1 + 1
-
-        if ic1 >= size:
-            break
-        elif ic2 >= size:
-            if priorities[ic1] > p:
-                i_swap = ic1
-            else:
-                break
-        elif priorities[ic1] >= priorities[ic2]:
-            if p < priorities[ic1]:
-                i_swap = ic1
-            else:
-                break
-        else:
-            if p < priorities[ic2]:
-                i_swap = ic2
-            else:
-                break
-
-        priorities[i] = priorities[i_swap]
-        indices[i] = indices[i_swap]
-        flags[i] = flags[i_swap]
-
-        i = i_swap
-
-    priorities[i] = p
-    indices[i] = n
-    flags[i] = f
-
-    return 1
+    return _heap_push_kernel(priorities, indices, flags, p, n, f, True)
 
 
 @numba.njit(
@@ -864,8 +846,7 @@ def checked_flagged_heap_push(priorities, indices, flags, p, n, f):
         "d": numba.float32,
         "added": numba.uint8,
         "n": numba.uint32,
-        "i": numba.uint32,
-        "j": numba.uint32,
+        "k": numba.int64,
     },
 )
 def apply_graph_updates_low_memory(current_graph, updates):
@@ -875,38 +856,71 @@ def apply_graph_updates_low_memory(current_graph, updates):
     indices = current_graph[0]
     flags = current_graph[2]
     n_threads = numba.get_num_threads()
+    thread_mask = n_threads - 1
+    threads_pow2 = (n_threads & thread_mask) == 0
+    n_update_lists = len(updates)
+
+    # Bucket the updates by the thread that owns the row they are applied to,
+    # so that each thread only visits its own updates rather than every thread
+    # scanning all of them. Each update list is counted and copied by a single
+    # iteration, so the per (thread, list) counts and cursors need no locking.
+    bucket_counts = np.zeros((n_threads, n_update_lists), dtype=np.int64)
+    for i in numba.prange(n_update_lists):
+        for j in range(len(updates[i])):
+            p, q, d = updates[i][j]
 
-    for n in numba.prange(n_threads):
-        for i in range(len(updates)):
-            for j in range(len(updates[i])):
-                p, q, d = updates[i][j]
+            if p == -1 or q == -1:
+                continue
 
-                if p == -1 or q == -1:
-                    continue
+            bucket_counts[thread_index(p, n_threads, thread_mask, threads_pow2), i] += 1
+            bucket_counts[thread_index(q, n_threads, thread_mask, threads_pow2), i] += 1
 
-                if p % n_threads == n:
-                    # added = heap_push(current_graph, p, d, q, 1)
-                    added = checked_flagged_heap_push(
-                        priorities[p],
-                        indices[p],
-                        flags[p],
-                        d,
-                        q,
-                        1,
-                    )
-                    n_changes += added
+    bucket_ends = np.cumsum(bucket_counts).reshape(bucket_counts.shape)
+    bucket_cursors = bucket_ends - bucket_counts
+    thread_starts = np.zeros(n_threads + 1, dtype=np.int64)
+    for n in range(n_threads):
+        thread_starts[n + 1] = thread_starts[n] + bucket_counts[n].sum()
 
-                if q % n_threads == n:
-                    # added = heap_push(current_graph, q, d, p, 1)
-                    added = checked_flagged_heap_push(
-                        priorities[q],
-                        indices[q],
-                        flags[q],
-                        d,
-                        p,
-                        1,
-                    )
-                    n_changes += added
+    update_targets = np.empty(thread_starts[-1], dtype=np.int32)
+    update_sources = np.empty(thread_starts[-1], dtype=np.int32)
+    update_distances = np.empty(thread_starts[-1], dtype=np.float32)
+
+    for i in numba.prange(n_update_lists):
+        for j in range(len(updates[i])):
+            p, q, d = updates[i][j]
+
+            if p == -1 or q == -1:
+                continue
+
+            owner = thread_index(p, n_threads, thread_mask, threads_pow2)
+            k = bucket_cursors[owner, i]
+            update_targets[k] = p
+            update_sources[k] = q
+            update_distances[k] = d
+            bucket_cursors[owner, i] += 1
+
+            owner = thread_index(q, n_threads, thread_mask, threads_pow2)
+            k = bucket_cursors[owner, i]
+            update_targets[k] = q
+            update_sources[k] = p
+            update_distances[k] = d
+            bucket_cursors[owner, i] += 1
+
+    for n in numba.prange(n_threads):
+        for k in range(thread_starts[n], thread_starts[n + 1]):
+            p = update_targets[k]
+            q = update_sources[k]
+            d = update_distances[k]
+            # added = heap_push(current_graph, p, d, q, 1)
+            added = checked_flagged_heap_push(
+                priorities[p],
+                indices[p],
+                flags[p],
+                d,
+                q,
+                1,
+            )
+            n_changes += added
 
     return n_changes
 
@@ -947,11 +961,11 @@ def apply_graph_updates_high_memory(current_graph, updates, in_graph):
             else:
                 # added = unchecked_heap_push(current_graph, q, d, p, 1)
                 added = flagged_heap_push(
-                    current_graph[1][p],
-                    current_graph[0][p],
-                    current_graph[2][p],
+                    current_graph[1][q],
+                    current_graph[0][q],
+                    current_graph[2][q],
                     d,
-                    q,
+                    p,
                     1,
                 )
 
@@ -962,10 +976,10 @@ def apply_graph_updates_high_memory(current_graph, updates, in_graph):
     return n_changes
 
 
-@numba.njit()
+@numba.njit(parallel=True)
 def initalize_heap_from_graph_indices(heap, graph_indices, data, metric):
 
-    for i in range(graph_indices.shape[0]):
+    for i in numba.prange(graph_indices.shape[0]):
         for idx in range(graph_indices.shape[1]):
             j = graph_indices[i, idx]
             if j >= 0:
@@ -981,15 +995,16 @@ def sparse_initalize_heap_from_graph_indices(
 ):
 
     for i in numba.prange(graph_indices.shape[0]):
+        ind1 = data_indices[data_indptr[i] : data_indptr[i + 1]]
+        data1 = data_vals[data_indptr[i] : data_indptr[i + 1]]
         for idx in range(graph_indices.shape[1]):
             j = graph_indices[i, idx]
-            ind1 = data_indices[data_indptr[i] : data_indptr[i + 1]]
-            data1 = data_vals[data_indptr[i] : data_indptr[i + 1]]
-            ind2 = data_indices[data_indptr[j] : data_indptr[j + 1]]
-            data2 = data_vals[data_indptr[j] : data_indptr[j + 1]]
-            d = metric(ind1, data1, ind2, data2)
-            # unchecked_heap_push(heap, i, d, j, 1)
-            flagged_heap_push(heap[0][i], heap[1][i], heap[2][i], j, d, 1)
+            if j >= 0:
+                ind2 = data_indices[data_indptr[j] : data_indptr[j + 1]]
+                data2 = data_vals[data_indptr[j] : data_indptr[j + 1]]
+                d = metric(ind1, data1, ind2, data2)
+                # unchecked_heap_push(heap, i, d, j, 1)
+                flagged_heap_push(heap[1][i], heap[0][i], heap[2][i], d, j, 1)
 
     return heap
 